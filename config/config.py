@@ -1,22 +1,44 @@
 import os
+from pathlib import Path
+from types import MappingProxyType
 from dotenv import load_dotenv
 
-# Load environment variables
+# Project root, so default paths work wherever the app is started from
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Load environment variables once, at import
 load_dotenv()
 
 # API Key
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
 # Database Configuration
-DB_CONFIG = {
+DB_CONFIG = MappingProxyType({
     "host": os.getenv("DB_HOST", "localhost"),
     "user": os.getenv("DB_USER", "root"),
     "database": os.getenv("DB_NAME", "financial_tracker")
-}
+})
 
 # File Paths for Logging & Reports
-FILE_PATHS = {
-    "logs": os.getenv("LOG_FILE"),
-    "reports": os.getenv("REPORTSgit _FOLDER"),
-    "receipts": os.getenv("RECEIPTS_FOLDER")
-}
\ No newline at end of file
+FILE_PATHS = MappingProxyType({
+    "logs": os.getenv("LOG_FILE", str(PROJECT_ROOT / "workflows" / "transaction_logs.txt")),
+    "reports": os.getenv("REPORTS_FOLDER"),
+    "receipts": os.getenv("RECEIPTS_FOLDER", str(PROJECT_ROOT / "workflows" / "receipts"))
+})
+
+# Read-only view of every setting above
+SETTINGS = MappingProxyType({
+    "GEMINI_API_KEY": GEMINI_API_KEY,
+    "DB_CONFIG": DB_CONFIG,
+    "FILE_PATHS": FILE_PATHS
+})
+
+def get(name, default=None):
+    """
+    Returns a setting resolved at import instead of reading the environment again.
+
+    Args:
+        name (str): The setting name, e.g. "DB_CONFIG".
+        default: Value returned when the setting does not exist.
+    """
+    return SETTINGS.get(name, default)
@@ -0,0 +1,14 @@
+-- Composite indexes for the per-user lookups issued by src/tools.py
+-- (analyze_spending, predict_future_spending, generate_financial_advice).
+--
+-- Every spending query filters Transactions by user_id and a date range,
+-- and every budget query filters Budgets by user_id and month.
+--
+-- Verify with:
+--   EXPLAIN SELECT amount FROM Transactions
+--   WHERE user_id = 1 AND date >= DATE_SUB(CURDATE(), INTERVAL 3 MONTH);
+-- which should report type=range on idx_tx_user_date.
+
+CREATE INDEX idx_tx_user_date ON Transactions (user_id, date);
+
+CREATE INDEX idx_budget_user_month ON Budgets (user_id, month);
@@ -0,0 +1,14 @@
+-- Replace the (user_id, date) index from 001 with a covering index.
+--
+-- The spending queries only read amount and payment_method from the rows
+-- in a user's date range, so with these columns in the index MySQL can
+-- answer them from the index pages alone.
+--
+-- Verify with:
+--   EXPLAIN SELECT payment_method, COUNT(*) FROM Transactions
+--   WHERE user_id = 1 AND date >= '2025-03-01' GROUP BY payment_method;
+-- which should report "Using where; Using index" on tx_user_date.
+
+CREATE INDEX tx_user_date ON Transactions (user_id, date, amount, payment_method);
+
+DROP INDEX idx_tx_user_date ON Transactions;
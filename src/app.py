@@ -1,338 +1,136 @@
 import streamlit as st
-from typing import Dict, Union, Optional
-import os
+from typing import Dict, Optional
 import sys
 import re
-import pandas as pd
-import numpy as np
-import datetime
-from fpdf import FPDF
+from pathlib import Path
+from concurrent.futures import Future
 from google import genai
 from google.genai.types import GenerateContentConfig
 
-# Add config and data paths to sys.path
-sys.path.append(r"D:\@icog_projects\personalized-financial-assistant\config")
-sys.path.append(r"D:\@icog_projects\personalized-financial-assistant\data")
+# Make the config directory importable, relative to this file
+CONFIG_DIR = str(Path(__file__).resolve().parents[1] / "config")
+if CONFIG_DIR not in sys.path:
+    sys.path.insert(0, CONFIG_DIR)
 
-from db_connection import create_connection
-from config import GEMINI_API_KEY, DB_CONFIG, FILE_PATHS
-from save_log import log_transaction
+from config import GEMINI_API_KEY
+from caches import cache_lock, response_cache
+from tools import (
+    retrieve_user_data,
+    analyze_spending,
+    generate_financial_advice,
+    predict_future_spending,
+    take_receipt_pdf,
+    functions,
+    get_executor,
+    save_receipt
+)
 
 # gemini Setup
-client = genai.Client(api_key=GEMINI_API_KEY)
-model_id = "gemini-1.5-flash"
-
-# --- Tools for Gemini ---
-def retrieve_user_data(user_id: int) -> Union[Dict[str, Union[int, str, float, None]], Dict[str, str]]:
+@st.cache_resource
+def get_client() -> genai.Client:
+    """
+    Builds the Gemini client once per process so its HTTP connections survive Streamlit reruns.
     """
-    Retrieves a user's profile from the database, including personal details and salary.
+    return genai.Client(api_key=GEMINI_API_KEY)
 
-    Args:
-        user_id (int): The unique identifier of the user.
+model_id = "gemini-1.5-flash"
 
-    Returns:
-        dict: A dictionary containing user details (user_id, fname, lname, age, gender,
-              occupation, email, created_at, salary) or an error message if the user is not found.
-    """
-    db = create_connection()
-    if not db:
-        return {"error": "Database connection failed."}
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT u.user_id, u.fname, u.lname, u.age, u.gender, u.occupation, u.email, u.created_at, b.salary
-        FROM Users u
-        LEFT JOIN Budgets b ON u.user_id = b.user_id
-        WHERE u.user_id = %s AND b.month = 'May' 
-    """, (user_id,))
-    user_data = cursor.fetchone()
-    cursor.close()
-    db.close()
-
-    if not user_data:
-        return {"error": "User not found."}
-
-    return {
-        "user_id": user_data["user_id"],
-        "fname": user_data["fname"],
-        "lname": user_data["lname"],
-        "age": user_data["age"],
-        "gender": user_data["gender"],
-        "occupation": user_data["occupation"],
-        "email": user_data["email"],
-        "created_at": user_data["created_at"].isoformat(),
-        "salary": float(user_data["salary"]) 
-    }
-
-def analyze_spending(user_id: int) -> Union[Dict, Dict[str, str]]:
-    """
-    Analyzes spending patterns over the last 3 months.
-    Args:
-        user_id (int): The unique identifier of the user.
-    Returns:
-        dict: A dictionary containing spending insights (total_spent, monthly_spending,
-              top_payment_methods) or an error message if no transactions are found.
+# Precompiled pattern for pulling IDs out of prompts
+_ID_RE = re.compile(r"\d+", re.ASCII)
+
+# --- Configuration and tools for Gemini ---
+@st.cache_resource
+def get_config() -> GenerateContentConfig:
     """
-    db = create_connection()
-    if not db:
-        return {"error": "Database connection failed."}
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT date, amount, payment_method, description 
-        FROM Transactions 
-        WHERE user_id = %s AND date >= DATE_SUB(CURDATE(), INTERVAL 3 MONTH)
-        ORDER BY date ASC
-    """, (user_id,))
-    transactions = cursor.fetchall()
-    cursor.close()
-    db.close()
-
-    if not transactions:
-        return {"error": "No transactions foundn for the user you are requesting in the last 3 months or the user may not be registered in the db."}
-
-    df = pd.DataFrame(transactions)
-    df["date"] = pd.to_datetime(df["date"])
-    df["month"] = df["date"].dt.strftime("%B")
-
-    total_spent = float(df["amount"].sum())
-    monthly_spent = {month: float(amount) for month, amount in df.groupby("month")["amount"].sum().items()}
-    pay_number = df["payment_method"].value_counts().to_dict()
-
-    data = {
-        "total_spent": total_spent,
-        "monthly_spending": monthly_spent,
-        "top_payment_methods": pay_number
-    }
-    return data
-
-def generate_financial_advice(user_id: int) -> Dict[str, Union[float, str]]:
+    Builds the Gemini request config (system instruction and tools) once per process.
     """
-    Generates personalized financial advice based on current month financial data.
+    return GenerateContentConfig(
+        system_instruction="""
+        You are an expert financial assistant powered by real-time data from a MySQL database. Your task is to deliver precise, engaging, and personalized financial insights that empower users to make smart decisions. Use the provided tools to fetch and analyze data, analyze spending patterns, predict future spending, generate transaction receipts and provide tailored financial advice. Your responses should be informative and present responses in a visually appealing markdown format with emojis, tables, and bullet points where appropriate. Ensure answers conversational, and tailored to the user's query. 
+        """,
+        tools = functions
+    )
 
-    Args:
-        user_id (int): The unique identifier of the user.
+# --- Helper Functions ---
+def extract_user_id(text: str) -> Optional[int]:
+    id = _ID_RE.search(text)
+    
+    if id:
+        return int(id.group(0))
+    return None
+    
+def extract_transaction_id(text: str) -> Optional[int]:
+    tr_id = _ID_RE.search(text)
+    if tr_id:
+        return int(tr_id.group(0))
+    return None
 
-    Returns:
-        dict: A dictionary containing financial data (name, salary, expense_limit,
-              savings_goal, total_spent) or an error message if data is missing.
-    """
-    db = create_connection()
-    if not db:
-        return {"error": "Database connection failed."}
-
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT salary, expense_limit, savings_goal 
-        FROM Budgets 
-        WHERE user_id = %s AND month = 'May'
-    """, (user_id,))
-    budget = cursor.fetchone()
-    cursor.execute("""
-        SELECT SUM(amount) AS total_spent 
-        FROM Transactions 
-        WHERE user_id = %s AND date >= DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
-    """, (user_id,))
-    spending_data = cursor.fetchone()
-    cursor.execute("SELECT fname, lname FROM Users WHERE user_id = %s", (user_id,))
-    user_data = cursor.fetchone()
-    cursor.close()
-    db.close()
-
-    if not budget or not user_data:
-        return {"error": "No budget or user data found."}
-
-    return {
-        "name": f"{user_data['fname']} {user_data['lname']}",
-        "salary": float(budget["salary"]),  
-        "expense_limit": float(budget["expense_limit"]),
-        "savings_goal": float(budget["savings_goal"]),
-        "total_spent": float(spending_data["total_spent"] or 0)
-    }
-
-def predict_future_spending(user_id: int) -> Dict[str, float]:
+def prefetch_tools(user_id: int, *tools) -> Dict[str, Future]:
     """
-    Predicts future spending based on historical transaction data.
+    Starts the given tools for a user on the worker pool, so their database queries
+    run concurrently rather than one after another inside Gemini's function-calling loop.
 
     Args:
         user_id (int): The unique identifier of the user.
+        *tools: The tool functions to run.
 
     Returns:
-        dict: A dictionary containing average_spending and predicted_spending, or an error
-              message if insufficient data is available.
+        dict: Pending results keyed by tool name.
     """
-    db = create_connection()
-    if not db:
-        return {"error": "Database connection failed."}
-
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT date, amount 
-        FROM Transactions 
-        WHERE user_id = %s AND date >= DATE_SUB(CURDATE(), INTERVAL 3 MONTH)
-        ORDER BY date ASC
-    """, (user_id,))
-    transactions = cursor.fetchall()
-    cursor.close()
-    db.close()
-
-    if not transactions:
-        return {"error": "Not enough transaction history."}
-
-    df = pd.DataFrame(transactions)
-    df["date"] = pd.to_datetime(df["date"])
-    df["month"] = df["date"].dt.strftime("%B")
-
-    monthly_totals = df.groupby("month")["amount"].sum()
-    avg_spending = float(np.mean(monthly_totals))  
-    predicted_spending = avg_spending * np.random.uniform(0.9, 1.2)
-
-    return {
-        "average_spending": avg_spending,
-        "predicted_spending": float(predicted_spending)
-    }
-
-
-def record_transaction(user_input: str) -> Dict[str, Union[int, float, str]]:
+    return {tool.__name__: get_executor().submit(_run_tool, tool, user_id) for tool in tools}
+
+def _run_tool(tool, user_id: int) -> Dict:
+    # A failed prefetch reaches Gemini as an error dict, as it would through function calling,
+    # instead of re-raising on the page thread
+    try:
+        return tool(user_id)
+    except Exception as error:
+        return {"error": f"{tool.__name__} failed: {error}"}
+
+def attach_tool_data(contents: str, tool_futures: Dict[str, Future]) -> str:
     """
-    Records a transaction in the database based on user input. and to the log file as well.
+    Appends prefetched tool output to a prompt so Gemini can answer without
+    a function-calling round-trip for the same data.
 
     Args:
-        user_input (str): A string describing the transaction, e.g., "User 7 spent 250 ETB for groceries via CBE today".
+        contents (str): The prompt sent to Gemini.
+        tool_futures (dict): Pending tool results keyed by tool name, as returned by prefetch_tools.
 
     Returns:
-        dict: A dictionary containing transaction details (user_id, date, amount,
-              payment_method, description) or an error message if the input is invalid.
+        str: The prompt with the tool output appended.
     """
-    db = create_connection()
-    if not db:
-        return {"error": "Database connection failed."}
-
-    cursor = db.cursor()
-    match = re.search(r"User (\d+) spent (\d+\.?\d*) ETB (.+) via (.+) today", user_input)
-    if not match:
-        cursor.close()
-        db.close()
-        return {"error": "Invalid format. Use: 'User [ID] spent [Amount] ETB for [Purpose] via [Payment Method] today.'"}
-
-    user_id = int(match.group(1))
-    amount = float(match.group(2))
-    description = match.group(3)
-    payment_method = match.group(4)
-    date = datetime.date.today().strftime("%Y-%m-%d")
-
-    query = """
-        INSERT INTO Transactions (user_id, date, amount, payment_method, description) 
-        VALUES (%s, %s, %s, %s, %s)
-    """
-    cursor.execute(query, (user_id, date, amount, payment_method, description))
-    cursor.close()
-    db.close()
-    # Log the transaction to a file
-    log_transaction(user_id, date, amount, payment_method, description)
-
-    return {
-        "user_id": user_id,
-        "date": date,
-        "amount": amount,
-        "payment_method": payment_method,
-        "description": description
-    }
-
-def generate_transaction_receipt(transaction_id: int) -> Dict[str, Union[int, float, str]]:
+    for tool_name, data_future in tool_futures.items():
+        contents += f"\n    Data already returned by {tool_name}: {data_future.result()}\n"
+    return contents
+
+def render_gemini_stream(contents: str, cacheable: bool = False) -> str:
     """
-    Generates a PDF receipt for a specific transaction.
+    Streams Gemini's response into the page chunk by chunk instead of waiting for the full answer.
 
     Args:
-        transaction_id (int): The unique identifier of the transaction.
+        contents (str): The prompt sent to Gemini.
+        cacheable (bool): Reuse the response for prompts that only differ in case or whitespace.
+                          Only for pages whose tools do not write anything.
 
     Returns:
-        dict: A dictionary containing receipt details (user_full_name, transaction_id, user_id, date,
-              amount, payment_method, description, receipt_path) or an error message.
+        str: The full response text.
     """
-    db = create_connection()
-    if not db:
-        return {"error": "Database connection failed."}
-
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM Transactions WHERE transaction_id = %s", (transaction_id,))
-    transaction = cursor.fetchone()
-    cursor.close()
-
-    if not transaction:
-        return {"error": f"No transaction found with ID {transaction_id}."}
-
-    user_id = transaction["user_id"]
-    cursor = db.cursor(dictionary=True)
-    cursor.execute("SELECT fname, lname FROM Users WHERE user_id = %s", (user_id,))
-    user = cursor.fetchone()
-    cursor.close()
-    db.close()
-    user_full_name = f"{user['fname']} {user['lname']}"
-    date = transaction["date"].strftime("%Y-%m-%d")  
-    amount = float(transaction["amount"]) 
-    payment_method = transaction["payment_method"]
-    description = transaction["description"]
-
-    receipt_filename = f"workflows/receipts/user{user_id}-transaction{transaction_id}-receipt.pdf"
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 20)
-    pdf.cell(200, 10, "Transaction Receipt", ln=True)
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(200, 10, f"User: {user_full_name}", ln=True)
-    pdf.cell(200, 10, f"Transaction ID: {transaction_id}", ln=True)
-    pdf.cell(200, 10, f"User ID: {user_id}", ln=True)
-    pdf.cell(200, 10, f"Date: {date}", ln=True)
-    pdf.cell(200, 10, f"Amount: ETB {amount:.2f}", ln=True)
-    pdf.cell(200, 10, f"Payment Method: {payment_method}", ln=True)
-    pdf.cell(200, 10, f"Description: {description}", ln=True)
-    pdf.cell(200, 10, "", ln=True)
-    pdf.cell(200, 10, "", ln=True)
-    pdf.cell(200, 10, "Sincerly,", ln=True)
-    pdf.cell(200, 10, "Dr. Abebe", ln=True)
-    pdf.cell(200, 10, f"{payment_method} Manager", ln=True)
-    pdf.output(receipt_filename)
-
-    return {
-        "user_full_name": user_full_name,
-        "transaction_id": transaction_id,
-        "user_id": user_id,
-        "date": date,
-        "amount": amount,
-        "payment_method": payment_method,
-        "description": description,
-    }
-
-# --- Function Declarations for Gemini ---
-functions = [
-    retrieve_user_data,
-    analyze_spending,
-    generate_financial_advice,
-    predict_future_spending,
-    record_transaction,
-    generate_transaction_receipt
-]
-
-# --- Configuration and tools for Gemini ---
-config = GenerateContentConfig(
-    system_instruction="""
-    You are an expert financial assistant powered by real-time data from a MySQL database. Your task is to deliver precise, engaging, and personalized financial insights that empower users to make smart decisions. Use the provided tools to fetch and analyze data, analyze spending patterns, predict future spending, generate transaction receipts and provide tailored financial advice. Your responses should be informative and present responses in a visually appealing markdown format with emojis, tables, and bullet points where appropriate. Ensure answers conversational, and tailored to the user's query. 
-    """,
-    tools = functions
-)
-
-# --- Helper Functions ---
-def extract_user_id(text: str) -> Optional[int]:
-    id = re.search(r"\d+", text)
-    
-    if id:
-        return int(id.group(0))
-    return None
-    
-def extract_transaction_id(text: str) -> Optional[int]:
-    tr_id = re.search(r"\d+", text)
-    if tr_id:
-        return int(tr_id.group(0))
-    return None
+    st.markdown("### Gemini’s Response")
+    cache_key = " ".join(contents.lower().split())
+    if cacheable:
+        with cache_lock:
+            cached = response_cache.get(cache_key)
+        if cached is not None:
+            st.markdown(cached)
+            return cached
+
+    stream = get_client().models.generate_content_stream(model=model_id, config=get_config(), contents=contents)
+    response_text = st.write_stream(chunk.text or "" for chunk in stream)
+    # An empty answer (e.g. a safety block) is not worth serving again for ten minutes
+    if cacheable and response_text and response_text.strip():
+        with cache_lock:
+            response_cache[cache_key] = response_text
+    return response_text
 
 # --- Streamlit Pages ---
 def home():
@@ -359,20 +157,18 @@ def user_profile_page():
             st.error("Could not extract user ID. Try: `details user id 2`.")
             return
 
+        profile_futures = prefetch_tools(user_id, retrieve_user_data)
         with st.spinner("Fetching profile..."):
-            gemini_response = client.models.generate_content(
-                model=model_id,
-                config=config,
-                contents=f"""
+            render_gemini_stream(
+                attach_tool_data(f"""
                 Based on the prompt: '{prompt}'. Display the profile of user {user_id} in a vibrant, organized format. Use markdown with:
                 - A header with the user's full name 
                 - A table for details (User Name, User ID, Age, Gender, Occupation, Email, Account Created, Salary in ETB)
                 - Emojis for visual appeal
                 - A brief summary of the user's financial health
-                """
+                """, profile_futures),
+                cacheable=True
             )
-            st.markdown("### Gemini’s Response")
-            st.success(gemini_response.text)
 
 def spending_analysis_page():
     st.title(" Spending Analyser ")
@@ -383,21 +179,19 @@ def spending_analysis_page():
             st.error("Could not extract user ID. the user may not be registered in the db or try: try to contact the support center.")
             return
 
+        spending_futures = prefetch_tools(user_id, analyze_spending)
         with st.spinner("Analyzing spending..."):
-            gemini_response = client.models.generate_content(
-                model=model_id,
-                config=config,
-                contents=f"""
+            render_gemini_stream(
+                attach_tool_data(f"""
                 Based on the prompt: '{prompt}'. Analyze the spending patterns for user {user_id} over the last 3 months. Provide a detailed response in markdown format with:
                 - A header summarizing total spending
                 - A table showing monthly breakdown (Month, Amount in ETB)
                 - A list of top payment methods with counts
                 - Key insights or trends
                 - Emojis for engagement
-                """
+                """, spending_futures),
+                cacheable=True
             )
-            st.markdown("### Gemini’s Response")
-            st.success(gemini_response.text)
 
 def financial_advice_page():
     st.title(" Financial Advisor")
@@ -409,21 +203,19 @@ def financial_advice_page():
             st.error("Could not extract user ID.")
             return
 
+        advice_futures = prefetch_tools(user_id, generate_financial_advice, analyze_spending)
         with st.spinner("Generating advice..."):
-            gemini_response = client.models.generate_content(
-                model=model_id,
-                config=config,
-                contents=f"""
+            render_gemini_stream(
+                attach_tool_data(f"""
                 Based on the prompt: '{prompt}'. Provide personalized financial advice for user {user_id} using their current financial data. Deliver a scientific yet accessible response in markdown format with:
                 - A header with the user's name
                 - A table summarizing financial data (Salary, Expense Limit, Savings Goal, Total Spent)
                 - Bullet points with actionable advice
                 - Emojis for visual flair
                 - A motivational closing statement
-                """
+                """, advice_futures),
+                cacheable=True
             )
-            st.markdown("### Gemini’s Response")
-            st.success(gemini_response.text)
 
 def future_spending_page():
     st.title("Future Spending Forecast")
@@ -434,21 +226,19 @@ def future_spending_page():
             st.error("Could not extract user ID.")
             return
 
+        prediction_futures = prefetch_tools(user_id, predict_future_spending, generate_financial_advice)
         with st.spinner("Predicting spending..."):
-            gemini_response = client.models.generate_content(
-                model=model_id,
-                config=config,
-                contents=f"""
+            render_gemini_stream(
+                attach_tool_data(f"""
                 Based on the prompt: '{prompt}'. Predict future spending for user {user_id} for the next month using the last 3 months' data.By considering the user's spending patterns and spending limit and inflation in ethiopia. Provide a detailed response in markdown format with:
                 - A header stating the prediction
                 - A table comparing average and predicted spending
                 - Bullet points explaining the prediction methodology
                 - Emojis for engagement
                 - A planning tip for the user
-                """
+                """, prediction_futures),
+                cacheable=True
             )
-            st.markdown("### Gemini’s Response")
-            st.success(gemini_response.text)
 
 def record_transaction_page():
     st.title("Transaction Recorder")
@@ -457,10 +247,8 @@ def record_transaction_page():
     prompt = st.text_input(" Enter transaction details a user made:")
     if st.button("Record Transaction"):
         with st.spinner("Recording transaction..."):
-            gemini_response = client.models.generate_content(
-                model=model_id,
-                config=config,
-                contents=f"""
+            render_gemini_stream(
+                f"""
                 Based on the prompt: '{prompt}'. Record the transaction in the database and log file. Provide a response in markdown format with:
                 - A confirmation header
                 - A table summarizing the transaction (User ID, Date, Amount, Payment Method, Description)
@@ -468,8 +256,6 @@ def record_transaction_page():
                 - Emojis for excitement
                 """
             )
-            st.markdown("### Gemini’s Response")
-            st.success(gemini_response.text)
 
 def transaction_receipt_page():
     st.title(" Transaction Receipt Generator")
@@ -482,10 +268,8 @@ def transaction_receipt_page():
             return
 
         with st.spinner("Generating receipt..."):
-            gemini_response = client.models.generate_content(
-                model=model_id,
-                config=config,
-                contents=f"""
+            render_gemini_stream(
+                f"""
                 Based on the prompt: '{prompt}'. Generate a receipt for transaction ID {transaction_id}. Provide a response in markdown format with:
                 - A confirmation header
                 - A table summarizing receipt details (User full name, Transaction ID, User ID, Date, Amount, Payment Method, Description)
@@ -494,33 +278,19 @@ def transaction_receipt_page():
                 
                 """
             )
-            st.markdown("###  Gemini’s Response")
-            st.success(gemini_response.text)
-
-            # add download the receipt feature
-            db = create_connection()
-            if not db:
-                st.error("Database connection failed.")
-                return
-            cursor = db.cursor(dictionary=True)
-            cursor.execute(f"SELECT transaction_id, user_id FROM transactions WHERE transaction_id = %s", (transaction_id,))
-            receipt_data = cursor.fetchone()
-            cursor.close()
-            db.close()
-            if receipt_data:
-                tr_id = receipt_data["transaction_id"]
-                user_id = receipt_data["user_id"]
-                root = r"D:\@icog_projects\personalized-financial-assistant\workflows\receipts"
-                receipt_path = os.path.join(root, f"user{user_id}-transaction{tr_id}-receipt.pdf")
-                
-                if os.path.exists(receipt_path):
-                    with open(receipt_path, "rb") as file:
-                        st.download_button(
-                            label="Download Transaction Receipt",
-                            data=file,
-                            file_name=os.path.basename(receipt_path),
-                            mime="application/pdf"
-                        )
+
+            # add download the receipt feature, reusing the receipt Gemini's tool call produced
+            receipt_pdf = take_receipt_pdf(transaction_id)
+            if receipt_pdf:
+                receipt, pdf_bytes = receipt_pdf
+                st.download_button(
+                    label="Download Transaction Receipt",
+                    data=pdf_bytes,
+                    file_name=receipt["receipt_filename"],
+                    mime="application/pdf",
+                    on_click=save_receipt,
+                    args=(receipt["receipt_filename"], pdf_bytes)
+                )
             else:
                 st.error("Receipt not found.")
             
@@ -0,0 +1,24 @@
+import threading
+from cachetools import TTLCache
+
+# Streamlit re-executes app.py in a fresh namespace on every rerun, so caches defined there
+# would start empty each time. An imported module stays in sys.modules and keeps them alive.
+
+# Profiles of recently viewed users, keyed by user_id (5 minute TTL)
+user_cache = TTLCache(maxsize=1024, ttl=300)
+
+# Spending summaries, keyed by user_id (1 minute TTL, shared by every page)
+spending_cache = TTLCache(maxsize=1024, ttl=60)
+
+# Budget and current spending used for advice, keyed by user_id (5 minute TTL)
+advice_cache = TTLCache(maxsize=1024, ttl=300)
+
+# Gemini responses for recently seen prompts, keyed by the normalized prompt (10 minute TTL)
+response_cache = TTLCache(maxsize=256, ttl=600)
+
+# Receipts and their PDFs being rendered in the background, keyed by transaction_id (5 minute
+# TTL, so a receipt whose page never collects it does not keep its PDF for the life of the process)
+receipt_jobs = TTLCache(maxsize=256, ttl=300)
+
+# TTLCache is not thread-safe; sessions and prefetch workers share the caches above
+cache_lock = threading.Lock()
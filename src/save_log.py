@@ -1,8 +1,29 @@
+import atexit
 import datetime
 import sys
-sys.path.append(r"D:\@icog_projects\personalized-financial-assistant\config")  
+import threading
+from pathlib import Path
+
+CONFIG_DIR = str(Path(__file__).resolve().parents[1] / "config")
+if CONFIG_DIR not in sys.path:
+    sys.path.insert(0, CONFIG_DIR)
 from config import FILE_PATHS
 
+# The log file stays open for the life of the process instead of being reopened per entry
+_log_file = None
+_log_lock = threading.Lock()
+
+def _get_log_file():
+    """
+    Opens the transaction log on first use. The handle is line buffered, so each entry is
+    handed to the OS as soon as it is written, and it is closed when the process exits.
+    """
+    global _log_file
+    if _log_file is None:
+        _log_file = open(FILE_PATHS["logs"], "a", buffering=1)
+        atexit.register(_log_file.close)
+    return _log_file
+
 def log_transaction(user_id, date, amount, payment_method = 'cash', description = 'for unexpected expenses'):
     """
     Logs transaction details inside logs.txt, including user ID, date, amount, payment method, and description. this could be user for backup or debugging purposes if failurity occurs.
@@ -21,7 +42,7 @@ def log_transaction(user_id, date, amount, payment_method = 'cash', description
     )
 
     # Save log to logs.txt
-    with open(FILE_PATHS["logs"], "a") as log_file:
-        log_file.write(log_entry)
+    with _log_lock:
+        _get_log_file().write(log_entry)
 
     return "Transaction successfully logged."
\ No newline at end of file
@@ -0,0 +1,621 @@
+import streamlit as st
+from typing import Dict, List, Tuple, Union, Optional
+import os
+import sys
+import re
+import statistics
+import datetime
+import calendar
+import copy
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from fpdf import FPDF
+from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool
+
+# Make the config directory importable, relative to this file
+CONFIG_DIR = str(Path(__file__).resolve().parents[1] / "config")
+if CONFIG_DIR not in sys.path:
+    sys.path.insert(0, CONFIG_DIR)
+
+from config import DB_CONFIG, FILE_PATHS
+from save_log import log_transaction
+from caches import cache_lock, user_cache, spending_cache, advice_cache, receipt_jobs
+
+# MySQL connection pool, shared by every tool so each call reuses a live connection
+@st.cache_resource
+def get_pool() -> MySQLConnectionPool:
+    """
+    Builds the MySQL connection pool once per process, so it survives Streamlit reruns and is
+    shared by every session. Sessions are not reset on release, so connections run in
+    autocommit mode (no read snapshot is carried over to the next borrower) and writes open
+    an explicit transaction.
+    """
+    return MySQLConnectionPool(
+        pool_name="fin",
+        pool_size=32,
+        pool_reset_session=False,
+        connection_timeout=10,
+        autocommit=True,
+        **DB_CONFIG
+    )
+
+def get_connection():
+    """
+    Borrows a connection from the pool. Calling close() on it returns it to the pool.
+
+    Returns:
+        PooledMySQLConnection: A pooled connection, or None if none could be acquired.
+    """
+    try:
+        return get_pool().get_connection()
+    except Error:
+        return None
+
+# Precompiled pattern for parsing user input. Only the fixed "User [ID] spent " prefix of a
+# transaction is matched by regex; scan_transaction splits the free-text rest without backtracking
+_TX_HEAD_RE = re.compile(r"User (\d+) spent ", re.ASCII)
+
+INSERT_TRANSACTION_SQL = """
+    INSERT INTO Transactions (user_id, date, amount, payment_method, description) 
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Worker threads for fetching tool data while the Gemini request is prepared
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Builds the worker pool once per process, so reruns reuse the same threads.
+    """
+    return ThreadPoolExecutor(max_workers=8)
+
+@st.cache_resource
+def get_pdf_template() -> FPDF:
+    """
+    Builds the receipt template once per process: page, fonts and title are set up here and
+    each copy only gets the body. A receipt always fits on one page, so page-break checks
+    are switched off. Callers must copy the template, never draw on it.
+    """
+    template = FPDF()
+    template.set_auto_page_break(False)
+    template.add_page()
+    template.set_font("Arial", "B", 20)
+    template.cell(200, 10, "Transaction Receipt", ln=True)
+    template.set_font("Arial", "", 12)
+    return template
+
+# --- Tools for Gemini ---
+def retrieve_user_data(user_id: int) -> Union[Dict[str, Union[int, str, float, None]], Dict[str, str]]:
+    """
+    Retrieves a user's profile from the database, including personal details and the current month's salary.
+
+    Args:
+        user_id (int): The unique identifier of the user.
+
+    Returns:
+        dict: A dictionary containing user details (user_id, fname, lname, age, gender,
+              occupation, email, created_at, salary) or an error message if the user is not found.
+    """
+    with cache_lock:
+        cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    db = get_connection()
+    if not db:
+        return {"error": "Database connection failed."}
+    try:
+        with db.cursor(dictionary=True) as cursor:
+            cursor.execute("""
+                SELECT u.user_id, u.fname, u.lname, u.age, u.gender, u.occupation, u.email, u.created_at, b.salary
+                FROM Users u
+                LEFT JOIN Budgets b ON b.user_id = u.user_id AND b.month = %s
+                WHERE u.user_id = %s
+                LIMIT 1
+            """, (budget_month(), user_id))
+            user_data = cursor.fetchone()
+    finally:
+        db.close()
+
+    if not user_data:
+        return {"error": "User not found."}
+
+    profile = {
+        "user_id": user_data["user_id"],
+        "fname": user_data["fname"],
+        "lname": user_data["lname"],
+        "age": user_data["age"],
+        "gender": user_data["gender"],
+        "occupation": user_data["occupation"],
+        "email": user_data["email"],
+        "created_at": user_data["created_at"].isoformat(),
+        "salary": float(user_data["salary"]) if user_data["salary"] is not None else None
+    }
+    with cache_lock:
+        user_cache[user_id] = profile
+    return profile
+
+def analyze_spending(user_id: int) -> Union[Dict, Dict[str, str]]:
+    """
+    Analyzes spending patterns over the last 3 months.
+    Args:
+        user_id (int): The unique identifier of the user.
+    Returns:
+        dict: A dictionary containing spending insights (total_spent, monthly_spending,
+              top_payment_methods) or an error message if no transactions are found.
+    """
+    with cache_lock:
+        cached = spending_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    db = get_connection()
+    if not db:
+        return {"error": "Database connection failed."}
+    # One range scan grouped by (month, payment method); the monthly sums, payment-method
+    # counts and the total are all folded from these few rows below
+    try:
+        with db.cursor() as cursor:
+            cursor.execute("""
+                SELECT MONTH(date) AS month, payment_method, MIN(date) AS first_day,
+                       SUM(amount) AS total, COUNT(*) AS uses
+                FROM Transactions 
+                WHERE user_id = %s AND date >= %s
+                GROUP BY month, payment_method
+                ORDER BY first_day ASC
+            """, (user_id, months_ago(3)))
+            rows = cursor.fetchall()
+    finally:
+        db.close()
+
+    if not rows:
+        return {"error": "No transactions foundn for the user you are requesting in the last 3 months or the user may not be registered in the db."}
+
+    total_spent = 0
+    monthly_totals = {}
+    method_uses = {}
+    for month, payment_method, _, total, uses in rows:
+        total_spent += total
+        monthly_totals[month] = monthly_totals.get(month, 0) + total
+        method_uses[payment_method] = method_uses.get(payment_method, 0) + uses
+
+    monthly_spent = {calendar.month_name[month]: float(total) for month, total in monthly_totals.items()}
+    pay_number = dict(sorted(method_uses.items(), key=lambda item: item[1], reverse=True))
+
+    data = {
+        "total_spent": float(total_spent),
+        "monthly_spending": monthly_spent,
+        "top_payment_methods": pay_number
+    }
+    with cache_lock:
+        spending_cache[user_id] = data
+    return data
+
+def generate_financial_advice(user_id: int) -> Dict[str, Union[float, str]]:
+    """
+    Generates personalized financial advice based on current month financial data.
+
+    Args:
+        user_id (int): The unique identifier of the user.
+
+    Returns:
+        dict: A dictionary containing financial data (name, salary, expense_limit,
+              savings_goal, total_spent) or an error message if data is missing.
+    """
+    with cache_lock:
+        cached = advice_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    db = get_connection()
+    if not db:
+        return {"error": "Database connection failed."}
+
+    try:
+        with db.cursor(dictionary=True) as cursor:
+            cursor.execute("""
+                SELECT u.fname, u.lname, b.salary, b.expense_limit, b.savings_goal,
+                       (SELECT COALESCE(SUM(t.amount), 0)
+                        FROM Transactions t
+                        WHERE t.user_id = u.user_id AND t.date >= %s) AS total_spent
+                FROM Users u
+                JOIN Budgets b ON b.user_id = u.user_id
+                WHERE u.user_id = %s AND b.month = %s
+            """, (months_ago(1), user_id, budget_month()))
+            advice_data = cursor.fetchone()
+    finally:
+        db.close()
+
+    if not advice_data:
+        return {"error": "No budget or user data found."}
+
+    advice = {
+        "name": f"{advice_data['fname']} {advice_data['lname']}",
+        "salary": float(advice_data["salary"]),  
+        "expense_limit": float(advice_data["expense_limit"]),
+        "savings_goal": float(advice_data["savings_goal"]),
+        "total_spent": float(advice_data["total_spent"])
+    }
+    with cache_lock:
+        advice_cache[user_id] = advice
+    return advice
+
+def predict_future_spending(user_id: int) -> Dict[str, float]:
+    """
+    Predicts next month's spending from the totals of the last 3 full calendar months, using a
+    linear trend and an exponentially weighted moving average (EWMA) of those totals. The
+    current month is left out, since its total is still partial.
+
+    Args:
+        user_id (int): The unique identifier of the user.
+
+    Returns:
+        dict: A dictionary containing average_spending, ewma_spending, trend_spending and
+              predicted_spending, or an error message if insufficient data is available.
+    """
+    db = get_connection()
+    if not db:
+        return {"error": "Database connection failed."}
+
+    try:
+        with db.cursor() as cursor:
+            cursor.execute("""
+                SELECT YEAR(date) AS year, MONTH(date) AS month, SUM(amount) AS total
+                FROM Transactions 
+                WHERE user_id = %s AND date >= %s AND date < %s
+                GROUP BY year, month
+            """, (user_id, month_start(3), month_start(0)))
+            monthly_rows = cursor.fetchall()
+    finally:
+        db.close()
+
+    if not monthly_rows:
+        return {"error": "Not enough transaction history."}
+
+    # Months without transactions count as zero spending, from the user's first month on
+    totals_by_month = {year * 12 + month - 1: float(total) for year, month, total in monthly_rows}
+    current_month = month_index(datetime.date.today())
+    monthly_totals = [totals_by_month.get(month, 0.0) for month in range(min(totals_by_month), current_month)]
+    avg_spending = statistics.fmean(monthly_totals)
+
+    ewma_spending = monthly_totals[0]
+    for total in monthly_totals[1:]:
+        ewma_spending = 0.5 * total + 0.5 * ewma_spending
+
+    # Extrapolate the straight-line fit one month ahead; a single month has no trend
+    if len(monthly_totals) > 1:
+        slope, intercept = statistics.linear_regression(range(len(monthly_totals)), monthly_totals)
+        trend_spending = max(slope * len(monthly_totals) + intercept, 0.0)
+    else:
+        trend_spending = avg_spending
+
+    return {
+        "average_spending": avg_spending,
+        "ewma_spending": ewma_spending,
+        "trend_spending": trend_spending,
+        "predicted_spending": (ewma_spending + trend_spending) / 2
+    }
+
+
+def record_transaction(user_input: str) -> Dict[str, Union[int, float, str]]:
+    """
+    Records a transaction in the database based on user input. and to the log file as well.
+
+    Args:
+        user_input (str): A string describing the transaction, e.g., "User 7 spent 250 ETB for groceries via CBE today".
+
+    Returns:
+        dict: A dictionary containing transaction details (user_id, date, amount,
+              payment_method, description) or an error message if the input is invalid.
+    """
+    transaction = parse_transaction(user_input)
+    if not transaction:
+        return {"error": "Invalid format. Use: 'User [ID] spent [Amount] ETB for [Purpose] via [Payment Method] today.'"}
+
+    result = record_transactions_bulk([transaction])
+    if "error" in result:
+        return result
+
+    return transaction
+
+def record_transactions(user_inputs: List[str]) -> Dict[str, Union[int, List[Dict], str]]:
+    """
+    Records several transactions with a single batched INSERT and one commit, and logs each of them.
+
+    Args:
+        user_inputs (list[str]): Transaction descriptions, each in the format accepted by record_transaction.
+
+    Returns:
+        dict: The number of recorded transactions and their details, or an error message if
+              any input is invalid, in which case nothing is recorded.
+    """
+    transactions = [parse_transaction(user_input) for user_input in user_inputs]
+    if not transactions or None in transactions:
+        return {"error": "Invalid format. Use: 'User [ID] spent [Amount] ETB for [Purpose] via [Payment Method] today.' for every transaction."}
+
+    return record_transactions_bulk(transactions)
+
+def record_transactions_bulk(transactions: List[Dict[str, Union[int, float, str]]]) -> Dict[str, Union[int, List[Dict], str]]:
+    """
+    Inserts already parsed transactions (e.g. an imported history) with one executemany call
+    inside a single transaction, so the whole batch costs one round-trip and one commit.
+    Each transaction is also written to the log file.
+
+    Args:
+        transactions (list[dict]): Transactions as returned by parse_transaction. Only the
+            user_id, date, amount, payment_method and description keys are read, in any order.
+
+    Returns:
+        dict: The number of recorded transactions and their details, or an error message.
+    """
+    db = get_connection()
+    if not db:
+        return {"error": "Database connection failed."}
+
+    try:
+        db.start_transaction()
+        with db.cursor() as cursor:
+            cursor.executemany(INSERT_TRANSACTION_SQL, [
+                (t["user_id"], t["date"], t["amount"], t["payment_method"], t["description"])
+                for t in transactions
+            ])
+        db.commit()
+    except Error:
+        db.rollback()
+        return {"error": "Failed to record the transactions; nothing was saved."}
+    finally:
+        db.close()
+
+    with cache_lock:
+        for transaction in transactions:
+            user_cache.pop(transaction["user_id"], None)
+            spending_cache.pop(transaction["user_id"], None)
+            advice_cache.pop(transaction["user_id"], None)
+    for transaction in transactions:
+        # Log the transaction to a file
+        log_transaction(
+            user_id=transaction["user_id"],
+            date=transaction["date"],
+            amount=transaction["amount"],
+            payment_method=transaction["payment_method"],
+            description=transaction["description"]
+        )
+
+    return {
+        "recorded": len(transactions),
+        "transactions": transactions
+    }
+
+def render_receipt_pdf(receipt: Dict[str, Union[int, float, str]]) -> bytes:
+    """
+    Renders a receipt returned by generate_transaction_receipt to PDF in memory.
+
+    Args:
+        receipt (dict): The receipt details.
+
+    Returns:
+        bytes: The PDF document.
+    """
+    pdf = copy.deepcopy(get_pdf_template())
+    lines = [
+        f"User: {receipt['user_full_name']}",
+        f"Transaction ID: {receipt['transaction_id']}",
+        f"User ID: {receipt['user_id']}",
+        f"Date: {receipt['date']}",
+        f"Amount: ETB {receipt['amount']:.2f}",
+        f"Payment Method: {receipt['payment_method']}",
+        f"Description: {receipt['description']}",
+        "",
+        "",
+        "Sincerly,",
+        "Dr. Abebe",
+        f"{receipt['payment_method']} Manager",
+    ]
+    pdf.multi_cell(200, 10, "\n".join(lines))
+    return pdf.output(dest="S").encode("latin-1")
+
+def save_receipt(receipt_filename: str, pdf_bytes: bytes) -> None:
+    """
+    Persists a rendered receipt once the user downloads it.
+
+    Args:
+        receipt_filename (str): The receipt's file name.
+        pdf_bytes (bytes): The PDF document.
+    """
+    with open(os.path.join(FILE_PATHS["receipts"], receipt_filename), "wb") as file:
+        file.write(pdf_bytes)
+
+def generate_transaction_receipt(transaction_id: int) -> Dict[str, Union[int, float, str]]:
+    """
+    Generates a PDF receipt for a specific transaction.
+
+    Args:
+        transaction_id (int): The unique identifier of the transaction.
+
+    Returns:
+        dict: A dictionary containing receipt details (user_full_name, transaction_id, user_id, date,
+              amount, payment_method, description, receipt_filename) or an error message.
+    """
+    receipt = _load_receipt(transaction_id)
+    if "error" not in receipt:
+        # Render the PDF in the background; the receipt page takes it with take_receipt_pdf
+        pdf_job = get_executor().submit(render_receipt_pdf, receipt)
+        with cache_lock:
+            receipt_jobs[transaction_id] = (receipt, pdf_job)
+
+    return receipt
+
+def take_receipt_pdf(transaction_id: int) -> Optional[Tuple[Dict[str, Union[int, float, str]], bytes]]:
+    """
+    Returns a receipt and its PDF for the download button. The PDF Gemini's tool call started
+    rendering is taken (and removed) if there is one; otherwise the receipt is rendered here.
+
+    Args:
+        transaction_id (int): The unique identifier of the transaction.
+
+    Returns:
+        tuple: The receipt details and the PDF document, or None if the receipt cannot be found.
+    """
+    with cache_lock:
+        receipt_job = receipt_jobs.pop(transaction_id, None)
+    if receipt_job:
+        receipt, pdf_job = receipt_job
+        return receipt, pdf_job.result()
+
+    receipt = _load_receipt(transaction_id)
+    if "error" in receipt:
+        return None
+    return receipt, render_receipt_pdf(receipt)
+
+def _load_receipt(transaction_id: int) -> Dict[str, Union[int, float, str]]:
+    db = get_connection()
+    if not db:
+        return {"error": "Database connection failed."}
+
+    try:
+        with db.cursor(dictionary=True) as cursor:
+            cursor.execute("""
+                SELECT t.*, u.fname, u.lname
+                FROM Transactions t
+                JOIN Users u ON u.user_id = t.user_id
+                WHERE t.transaction_id = %s
+            """, (transaction_id,))
+            transaction = cursor.fetchone()
+    finally:
+        db.close()
+
+    if not transaction:
+        return {"error": f"No transaction found with ID {transaction_id}."}
+
+    user_id = transaction["user_id"]
+    user_full_name = f"{transaction['fname']} {transaction['lname']}"
+    date = transaction["date"].strftime("%Y-%m-%d")  
+    amount = float(transaction["amount"]) 
+    payment_method = transaction["payment_method"]
+    description = transaction["description"]
+
+    receipt = {
+        "user_full_name": user_full_name,
+        "transaction_id": transaction_id,
+        "user_id": user_id,
+        "date": date,
+        "amount": amount,
+        "payment_method": payment_method,
+        "description": description,
+        "receipt_filename": f"user{user_id}-transaction{transaction_id}-receipt.pdf",
+    }
+    return receipt
+
+# --- Function Declarations for Gemini ---
+functions = [
+    retrieve_user_data,
+    analyze_spending,
+    generate_financial_advice,
+    predict_future_spending,
+    record_transaction,
+    record_transactions,
+    generate_transaction_receipt
+]
+
+# --- Helper Functions ---
+def budget_month() -> str:
+    """
+    Returns the current month's name as stored in Budgets.month (e.g. "May").
+    """
+    return calendar.month_name[datetime.date.today().month]
+
+def month_index(date: datetime.date) -> int:
+    """
+    Numbers calendar months consecutively, so months can be counted across year boundaries.
+
+    Args:
+        date (datetime.date): Any day of the month.
+
+    Returns:
+        int: The month's number, one higher for each following month.
+    """
+    return date.year * 12 + date.month - 1
+
+def month_start(months: int) -> datetime.date:
+    """
+    Returns the first day of the calendar month the given number of months before the current
+    one, e.g. month_start(0) is the first day of this month.
+
+    Args:
+        months (int): Number of months to go back.
+
+    Returns:
+        datetime.date: The first day of that month.
+    """
+    year, month = divmod(month_index(datetime.date.today()) - months, 12)
+    return datetime.date(year, month + 1, 1)
+
+def months_ago(months: int) -> datetime.date:
+    """
+    Returns today's date moved back by whole months, clamping the day the same way
+    MySQL's DATE_SUB(CURDATE(), INTERVAL n MONTH) does. Binding this as a constant
+    lets the optimizer use a plain range scan on Transactions(user_id, date).
+
+    Args:
+        months (int): Number of months to go back.
+
+    Returns:
+        datetime.date: The cutoff date.
+    """
+    today = datetime.date.today()
+    year, month = divmod(month_index(today) - months, 12)
+    day = min(today.day, calendar.monthrange(year, month + 1)[1])
+    return datetime.date(year, month + 1, day)
+
+def parse_transaction(user_input: str) -> Optional[Dict[str, Union[int, float, str]]]:
+    """
+    Parses a transaction description into the fields stored in the Transactions table.
+
+    Args:
+        user_input (str): A string describing the transaction, e.g., "User 7 spent 250 ETB for groceries via CBE today".
+
+    Returns:
+        dict: The transaction fields (user_id, date, amount, payment_method, description),
+              or None if the input does not match the expected format.
+    """
+    fields = scan_transaction(user_input)
+    if not fields:
+        return None
+    user_id, amount, description, payment_method = fields
+
+    return {
+        "user_id": int(user_id),
+        "date": datetime.date.today().strftime("%Y-%m-%d"),
+        "amount": float(amount),
+        "payment_method": payment_method,
+        "description": description
+    }
+
+def scan_transaction(user_input: str) -> Optional[Tuple[str, str, str, str]]:
+    """
+    Finds "User [ID] spent " and splits the rest of "[Amount] ETB [Purpose] via [Payment Method] today"
+    on its keywords with str.partition, so parsing is linear in the input length and cannot backtrack.
+
+    Args:
+        user_input (str): A string describing the transaction.
+
+    Returns:
+        tuple: The (user_id, amount, description, payment_method) strings, or None if the
+               input does not have that shape.
+    """
+    head = _TX_HEAD_RE.search(user_input)
+    if not head:
+        return None
+    amount, etb, rest = user_input[head.end():].partition(" ETB ")
+    description, via, rest = rest.partition(" via ")
+    payment_method, today, _ = rest.partition(" today")
+    if not (etb and via and today and description and payment_method):
+        return None
+
+    whole, point, fraction = amount.partition(".")
+    if not _is_ascii_number(whole) or (point and not _is_ascii_number(fraction)):
+        return None
+    return head.group(1), amount, description, payment_method
+
+def _is_ascii_number(text: str) -> bool:
+    return text.isascii() and text.isdigit()
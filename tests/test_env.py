@@ -1,5 +1,6 @@
 import sys
-sys.path.append(r"D:\@icog_projects\personalized-financial-assistant\config")  
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "config"))
 from config import GEMINI_API_KEY, DB_CONFIG, FILE_PATHS
 
 print("Gemini API Key:", GEMINI_API_KEY)
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+import datetime
+import sys
+from types import SimpleNamespace
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+import tools
+from tools import month_index, month_start, months_ago, predict_future_spending
+
+def on_day(year, month, day):
+    """
+    Patches tools so that date.today() returns the given day.
+    """
+    class FixedDate(datetime.date):
+        @classmethod
+        def today(cls):
+            return cls(year, month, day)
+    return mock.patch.object(tools, "datetime", SimpleNamespace(date=FixedDate))
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    def cursor(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params):
+        self.params = params
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+class TestMonthArithmetic(unittest.TestCase):
+    def test_months_ago_clamps_to_month_end(self):
+        with on_day(2024, 3, 31):
+            self.assertEqual(months_ago(1), datetime.date(2024, 2, 29))
+        with on_day(2023, 3, 31):
+            self.assertEqual(months_ago(1), datetime.date(2023, 2, 28))
+
+    def test_year_boundary(self):
+        with on_day(2024, 1, 15):
+            self.assertEqual(months_ago(1), datetime.date(2023, 12, 15))
+            self.assertEqual(month_start(0), datetime.date(2024, 1, 1))
+            self.assertEqual(month_start(3), datetime.date(2023, 10, 1))
+        self.assertEqual(month_index(datetime.date(2024, 1, 1)) - month_index(datetime.date(2023, 12, 31)), 1)
+
+class TestPredictFutureSpending(unittest.TestCase):
+    def predict(self, rows):
+        connection = FakeConnection(rows)
+        with mock.patch.object(tools, "get_connection", return_value=connection):
+            return predict_future_spending(7), connection.params
+
+    def test_steady_spending_forecasts_the_same_amount(self):
+        rows = [(2023, 10, 1000), (2023, 11, 1000), (2023, 12, 1000)]
+        for day in (3, 15, 28):
+            with on_day(2024, 1, day):
+                forecast, params = self.predict(rows)
+            self.assertEqual(params, (7, datetime.date(2023, 10, 1), datetime.date(2024, 1, 1)))
+            self.assertAlmostEqual(forecast["predicted_spending"], 1000.0)
+            self.assertAlmostEqual(forecast["trend_spending"], 1000.0)
+
+    def test_months_without_transactions_count_as_zero(self):
+        with on_day(2024, 1, 10):
+            forecast, _ = self.predict([(2023, 10, 900), (2023, 12, 900)])
+        self.assertAlmostEqual(forecast["average_spending"], 600.0)
+
+    def test_no_history(self):
+        with on_day(2024, 1, 10):
+            forecast, _ = self.predict([])
+        self.assertIn("error", forecast)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,28 @@
 import unittest
+from unittest import mock
 from datetime import datetime
 import sys
-sys.path.append(r"D:\@icog_projects\personalized-financial-assistant\src")
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+import save_log
 from save_log import log_transaction
 
 class TestLogTransaction(unittest.TestCase):
+    def setUp(self):
+        # Log to a temporary file instead of the tracked workflows/transaction_logs.txt
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.log_path = Path(temp_dir.name) / "transaction_logs.txt"
+        patchers = [
+            mock.patch.object(save_log, "FILE_PATHS", {"logs": str(self.log_path)}),
+            mock.patch.object(save_log, "_log_file", None),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: save_log._log_file and save_log._log_file.close())
+
     def test_log_transaction(self):
         user_id = 1
         date = datetime.now().strftime("%Y-%m-%d")
@@ -13,6 +31,7 @@ class TestLogTransaction(unittest.TestCase):
         description = "for unexpected expenses"
         result = log_transaction(user_id, date, amount, payment_method, description)
         self.assertEqual(result, "Transaction successfully logged.")
+        self.assertIn(f"User: {user_id} | Date: {date}", self.log_path.read_text())
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from tools import parse_transaction
+
+class TestParseTransaction(unittest.TestCase):
+    def test_parses_transaction(self):
+        transaction = parse_transaction("User 7 spent 250.5 ETB for groceries via Tele Birr today")
+        self.assertEqual(transaction["user_id"], 7)
+        self.assertEqual(transaction["amount"], 250.5)
+        self.assertEqual(transaction["description"], "for groceries")
+        self.assertEqual(transaction["payment_method"], "Tele Birr")
+
+    def test_ignores_leading_text(self):
+        transaction = parse_transaction("I spent a minute typing: User 3 spent 40 ETB for taxi via CBE today")
+        self.assertEqual(transaction["user_id"], 3)
+        self.assertEqual(transaction["amount"], 40.0)
+
+    def test_rejects_invalid_input(self):
+        self.assertIsNone(parse_transaction("User 7 spent lots ETB for groceries via CBE today"))
+        self.assertIsNone(parse_transaction("User 7 spent 250 ETB for groceries today"))
+
+    def test_long_malformed_input_is_rejected(self):
+        self.assertIsNone(parse_transaction("User 1 spent 1 ETB " + "a via " * 10000 + "tomorrow"))
+
+if __name__ == "__main__":
+    unittest.main()
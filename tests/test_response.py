@@ -1,7 +1,8 @@
 import unittest
 from google import genai
 import sys
-sys.path.append(r"D:\@icog_projects\personalized-financial-assistant\config")
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "config"))
 from config import GEMINI_API_KEY
 
 class TestGeminiResponse(unittest.TestCase):